@@ -1,89 +1,228 @@
 import streamlit as st
-import requests
-from rdflib import Graph, OWL, RDFS, RDF, URIRef, Literal
+from rdflib import Graph
 from pyvis.network import Network
-import tempfile
-import os
-
-ONTOLOGY_URL = "https://raw.githubusercontent.com/Wheatley961/AxiOnt/main/axiology_ontology_ru.ttl"
-
-@st.cache_resource
-def load_graph():
-    g = Graph()
-    response = requests.get(ONTOLOGY_URL)
-    response.raise_for_status()
-    g.parse(data=response.text, format="turtle")
-    return g
-
-def get_entities_and_labels_ru(g):
-    classes = set()
-    object_props = set()
-    datatype_props = set()
-    individuals = set()
-
-    labels = {}  # URIRef -> rdfs:label str (только с языком ru)
-    uris_with_ru_label = set()
-
-    # Собираем все rdfs:label с языком ru
-    for s, p, o in g.triples((None, RDFS.label, None)):
-        if isinstance(o, Literal) and o.language == 'ru':
-            labels[s] = str(o)
-            uris_with_ru_label.add(s)
-
-    # Теперь фильтруем сущности по наличию русской метки
-    for s, p, o in g.triples((None, RDF.type, None)):
-        if s not in uris_with_ru_label:
-            continue
-        if o == OWL.Class:
-            classes.add(s)
-        elif o == OWL.ObjectProperty:
-            object_props.add(s)
-        elif o == OWL.DatatypeProperty:
-            datatype_props.add(s)
-        elif (o == OWL.NamedIndividual) or (o not in [OWL.Class, OWL.ObjectProperty, OWL.DatatypeProperty]):
-            individuals.add(s)
-
-    # Иногда в онтологиях классы или индивиды могут не иметь rdf:type, но иметь метки — добавим их по умолчанию в индивиды
-    for uri in uris_with_ru_label:
-        if uri not in classes and uri not in object_props and uri not in datatype_props and uri not in individuals:
-            individuals.add(uri)
-
-    return classes, object_props, datatype_props, individuals, labels, uris_with_ru_label
-
-def node_color(node, classes, obj_props, dt_props, individuals):
-    if node in classes:
-        return "#1f77b4"  # синий
-    if node in obj_props or node in dt_props:
-        return "#ff7f0e"  # оранжевый
-    if node in individuals:
-        return "#2ca02c"  # зелёный
-    return "#7f7f7f"
-
-def draw_graph(g, classes_filter, indiv_filter, classes, obj_props, dt_props, individuals, labels, ru_uris):
+import networkx as nx
+import base64
+import html
+import json
+
+from ontology import (
+    CLASS,
+    DATATYPE_PROPERTY,
+    INDIVIDUAL,
+    OBJECT_PROPERTY,
+    build_label_index,
+    build_namespace_map,
+    build_ru_adjacency,
+    build_type_index,
+    compact_uri,
+    get_entities_and_labels_ru,
+    get_ontology,
+)
+
+LAYOUT_SCALE = 1000  # spring_layout возвращает координаты в [-1, 1], vis.js ждёт пиксели
+STREAM_CHUNK_SIZE = 500
+
+# Фильтры работают в браузере: страница с полным графом строится один раз,
+# а выбор в списках только скрывает узлы и рёбра в DataSet vis.js без перезапуска Streamlit
+FILTER_PANEL = """
+<div style="display: flex; gap: 16px; margin-bottom: 8px; font-family: sans-serif; font-size: 14px;">
+    <label style="flex: 1;">Фильтр по классам<br>
+        <select id="filter-classes" multiple size="6" style="width: 100%;">__CLASS_OPTIONS__</select>
+    </label>
+    <label style="flex: 1;">Фильтр по экземплярам<br>
+        <select id="filter-individuals" multiple size="6" style="width: 100%;">__INDIVIDUAL_OPTIONS__</select>
+    </label>
+</div>
+"""
+
+FILTER_SCRIPT = """
+<script type="text/javascript">
+    function selectedIds(selectId) {
+        var options = document.getElementById(selectId).selectedOptions;
+        return new Set(Array.from(options, function (option) { return option.value; }));
+    }
+
+    function filterActive() {
+        return selectedIds("filter-classes").size > 0 || selectedIds("filter-individuals").size > 0;
+    }
+
+    // Ребро видно, если касается выбранного класса и выбранного экземпляра (пустой выбор не ограничивает);
+    // узел виден, если у него осталось хотя бы одно видимое ребро
+    function applyFilter() {
+        var classIds = selectedIds("filter-classes");
+        var individualIds = selectedIds("filter-individuals");
+        function touches(edge, ids) {
+            return ids.size === 0 || ids.has(edge.from) || ids.has(edge.to);
+        }
+        var visibleNodes = new Set();
+        edges.update(edges.get().map(function (edge) {
+            var visible = touches(edge, classIds) && touches(edge, individualIds);
+            if (visible) {
+                visibleNodes.add(edge.from);
+                visibleNodes.add(edge.to);
+            }
+            return {id: edge.id, hidden: !visible};
+        }));
+        nodes.update(nodes.getIds().map(function (id) {
+            return {id: id, hidden: !visibleNodes.has(id)};
+        }));
+    }
+
+    document.getElementById("filter-classes").addEventListener("change", applyFilter);
+    document.getElementById("filter-individuals").addEventListener("change", applyFilter);
+    // Узлы и рёбра догружаются порциями; уже выбранный фильтр применяется и к ним
+    [nodes, edges].forEach(function (dataSet) {
+        dataSet.on("add", function () {
+            if (filterActive()) {
+                applyFilter();
+            }
+        });
+    });
+</script>
+"""
+
+# Физика по умолчанию выключена (позиции считаются на сервере); если её включить,
+# forceAtlas2Based сходится быстрее barnesHut, а число итераций стабилизации ограничено
+NETWORK_OPTIONS = {
+    "physics": {
+        "enabled": False,
+        "solver": "forceAtlas2Based",
+        "forceAtlas2Based": {"gravitationalConstant": -50, "centralGravity": 0.01, "springLength": 100},
+        "stabilization": {"iterations": 100, "updateInterval": 25},
+    },
+    "interaction": {"hideEdgesOnDrag": True},
+}
+
+# Узлы и рёбра догружаются после загрузки страницы: JSON разбирается асинхронно через fetch,
+# а в DataSet добавляется порциями по кадрам, чтобы не блокировать браузер
+GRAPH_STREAM_SCRIPT = """
+<script type="text/javascript">
+    fetch("data:application/json;base64,__GRAPH__")
+        .then(function (response) { return response.json(); })
+        .then(function (pending) {
+            function addChunks(dataSet, items, start, done) {
+                dataSet.add(items.slice(start, start + __CHUNK__));
+                if (start + __CHUNK__ < items.length) {
+                    requestAnimationFrame(function () { addChunks(dataSet, items, start + __CHUNK__, done); });
+                } else {
+                    done();
+                }
+            }
+            // Сначала узлы, затем рёбра; сеть создана пустой, поэтому вид подгоняется под узлы вручную
+            addChunks(nodes, pending.nodes, 0, function () {
+                network.fit();
+                addChunks(edges, pending.edges, 0, function () {
+                    // Ограниченную стабилизацию vis.js запускает только при первом setData, а сеть
+                    // создана пустой, поэтому при включённой физике она вызывается после последних рёбер
+                    if (__PHYSICS__) {
+                        network.stabilize(__ITERATIONS__);
+                    }
+                });
+            });
+        });
+</script>
+"""
+
+KIND_COLORS = {
+    CLASS: "#1f77b4",  # синий
+    OBJECT_PROPERTY: "#ff7f0e",  # оранжевый
+    DATATYPE_PROPERTY: "#ff7f0e",
+    INDIVIDUAL: "#2ca02c",  # зелёный
+}
+
+@st.cache_resource(hash_funcs={Graph: id})
+def compute_layout(g):
+    # Раскладка считается один раз на сервере для всех узлов с русскими метками,
+    # поэтому браузеру не нужно запускать физическую симуляцию, а позиции не прыгают между фильтрами
+    layout_graph = nx.DiGraph()
+    layout_graph.add_edges_from((s, o) for s, pairs in build_ru_adjacency(g).items() for p, o in pairs)
+    try:
+        # sfdp из Graphviz — многоуровневая раскладка на C, если установлены pygraphviz и сам Graphviz
+        pos = nx.rescale_layout_dict(nx.nx_agraph.graphviz_layout(layout_graph, prog="sfdp"))
+    except (ImportError, ValueError, OSError):  # нет pygraphviz, бинарника sfdp или он не запускается
+        pos = nx.spring_layout(layout_graph, seed=42)
+    return {node: (x * LAYOUT_SCALE, y * LAYOUT_SCALE) for node, (x, y) in pos.items()}
+
+def stream_graph(page, nodes, edges, physics):
+    data = {"nodes": nodes, "edges": edges}
+    payload = base64.b64encode(json.dumps(data, ensure_ascii=False).encode("utf-8")).decode("ascii")
+    script = (GRAPH_STREAM_SCRIPT
+              .replace("__GRAPH__", payload)
+              .replace("__CHUNK__", str(STREAM_CHUNK_SIZE))
+              .replace("__PHYSICS__", json.dumps(physics))
+              .replace("__ITERATIONS__", str(NETWORK_OPTIONS["physics"]["stabilization"]["iterations"])))
+    return page.replace("</body>", script + "</body>", 1)
+
+def sorted_by_label(uri_set, labels):
+    options = list(uri_set)
+    options.sort(key=lambda uri: labels.get(uri, str(uri)).lower())
+    return options
+
+@st.cache_resource(hash_funcs={Graph: id})
+def filter_options(g):
+    # Отсортированные списки для фильтров строятся один раз на граф
+    classes, obj_props, dt_props, individuals, labels, comments, ru_uris = get_entities_and_labels_ru(g)
+    return sorted_by_label(classes, labels), sorted_by_label(individuals, labels)
+
+def add_filter_panel(page, classes_options, indiv_options, labels):
+    def option_tags(uris):
+        return "".join(
+            f'<option value="{html.escape(str(uri))}">{html.escape(labels.get(uri, str(uri)))}</option>'
+            for uri in uris
+        )
+
+    panel = (FILTER_PANEL
+             .replace("__CLASS_OPTIONS__", option_tags(classes_options))
+             .replace("__INDIVIDUAL_OPTIONS__", option_tags(indiv_options)))
+    page = page.replace("<body>", "<body>" + panel, 1)
+    return page.replace("</body>", FILTER_SCRIPT + "</body>", 1)
+
+@st.cache_data(ttl=24 * 60 * 60, max_entries=64, hash_funcs={Graph: id})
+def draw_graph(g, physics=False):
+    # Страница строится один раз на граф: фильтрация выполняется в браузере
+    labels, comments, _ = build_label_index(g)
     net = Network(height="700px", width="100%", directed=True)
-    net.barnes_hut()
+    # Симуляция, если включена, стартует с серверной раскладки, а не со случайных позиций
+    options = {**NETWORK_OPTIONS, "physics": {**NETWORK_OPTIONS["physics"], "enabled": physics}}
+    net.set_options(json.dumps(options))
+    pos = compute_layout(g)
+
+    ns_map = build_namespace_map(g)
+    node_kind = build_type_index(g)
 
     def label_for(node):
-        return labels.get(node, str(node))
+        return labels.get(node) or compact_uri(node, ns_map)
 
-    # Добавляем ребра и узлы, но только если у узлов есть русская метка (ru_uris)
-    for s, p, o in g:
-        if not (s in ru_uris and o in ru_uris):
-            continue  # Показываем только узлы с русскими метками
+    # Каждый узел оформляется один раз, сколько бы рёбер в него ни входило
+    nodes = {}  # URIRef -> опции узла vis.js
+    edge_labels = {}  # предикат -> подпись ребра, предикатов намного меньше, чем рёбер
+    edges = []
 
-        # Проверяем фильтры
-        if classes_filter and not (s in classes_filter or o in classes_filter):
-            continue
-        if indiv_filter and not (s in indiv_filter or o in indiv_filter):
-            continue
+    def ensure_node(node):
+        # Возвращает строковый id узла, вычисленный один раз при первом появлении
+        info = nodes.get(node)
+        if info is None:
+            label = label_for(node)
+            x, y = pos[node]
+            info = nodes[node] = {"id": str(node), "label": label, "title": comments.get(node, label), "shape": "dot",
+                                  # узлы с русской меткой без rdf:type отнесены к экземплярам
+                                  "color": KIND_COLORS[node_kind.get(node, INDIVIDUAL)],
+                                  "x": x, "y": y, "physics": physics}
+        return info["id"]
 
-        net.add_node(str(s), label=label_for(s), color=node_color(s, classes, obj_props, dt_props, individuals))
-        net.add_node(str(o), label=label_for(o), color=node_color(o, classes, obj_props, dt_props, individuals))
-        net.add_edge(str(s), str(o), label=label_for(p))
+    # Добавляем ребра и узлы, но только если у обоих концов есть русская метка (ru_uris)
+    for s, pairs in build_ru_adjacency(g).items():
+        for p, o in pairs:
+            edge_label = edge_labels.get(p)
+            if edge_label is None:
+                edge_label = edge_labels[p] = label_for(p)
+            edges.append({"from": ensure_node(s), "to": ensure_node(o), "label": edge_label, "arrows": "to"})
 
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".html")
-    net.write_html(tmp.name, notebook=False)
-    return tmp.name
+    # Разметка pyvis содержит пустую сеть, узлы и рёбра догружаются скриптом
+    page = stream_graph(net.generate_html(notebook=False), list(nodes.values()), edges, physics)
+    classes_options, indiv_options = filter_options(g)
+    return add_filter_panel(page, classes_options, indiv_options, labels)
 
 def main():
     st.set_page_config(layout="wide")
@@ -94,36 +233,13 @@ def main():
     Её концептуальная база включает официальный перечень традиционных ценностей, принципы государственной гуманитарной политики, анализ угроз ценностному суверенитету, а также сценарный и программно-целевой подходы. Формально реализована в логике OWL.
     """)
 
-    g = load_graph()
-    classes, obj_props, dt_props, individuals, labels, ru_uris = get_entities_and_labels_ru(g)
-
-    def create_options(uri_set):
-        options = []
-        for uri in uri_set:
-            lab = labels.get(uri, str(uri))
-            options.append((lab, uri))
-        options.sort(key=lambda x: x[0].lower())
-        return options
-
-    classes_options = create_options(classes)
-    props_options = create_options(obj_props.union(dt_props))
-    indiv_options = create_options(individuals)
-
-    classes_selected = st.multiselect("Фильтр по классам", [lab for lab, _ in classes_options])
-    indiv_selected = st.multiselect("Фильтр по экземплярам", [lab for lab, _ in indiv_options])
-
-    def selected_to_uri(selected_labels, options):
-        label_to_uri = {lab: uri for lab, uri in options}
-        return set(label_to_uri[lab] for lab in selected_labels if lab in label_to_uri)
-
-    classes_filter = selected_to_uri(classes_selected, classes_options) if classes_selected else None
-    indiv_filter = selected_to_uri(indiv_selected, indiv_options) if indiv_selected else None
+    g = get_ontology()
 
-    html_file = draw_graph(g, classes_filter, indiv_filter, classes, obj_props, dt_props, individuals, labels, ru_uris)
+    physics = st.checkbox("Физическая симуляция раскладки", value=False,
+                          help="По умолчанию узлы размещаются по заранее рассчитанной раскладке без нагрузки на браузер")
 
-    html_content = open(html_file, "r", encoding="utf-8").read()
-    st.components.v1.html(html_content, height=750)
-    os.unlink(html_file)
+    html_content = draw_graph(g, physics)
+    st.components.v1.html(html_content, height=900)
 
     st.markdown("""
     <style>
@@ -0,0 +1,173 @@
+import streamlit as st
+import requests
+from rdflib import Graph, OWL, RDFS, RDF
+import hashlib
+import os
+import pickle
+from collections import defaultdict
+
+try:
+    import oxrdflib  # noqa: F401 — регистрирует в rdflib хранилище Oxigraph на Rust
+    GRAPH_STORE = "Oxigraph"
+except ImportError:
+    GRAPH_STORE = "default"
+
+# Исходник онтологии — axiology_ontology_ru.ttl; приложение загружает его копию в N-Triples:
+# построчный формат разбирается в разы быстрее Turtle. После каждой правки .ttl копию нужно
+# пересобрать (строки отсортированы, чтобы diff оставался читаемым):
+#   python -c "from rdflib import Graph; print(''.join(sorted(Graph().parse('axiology_ontology_ru.ttl').serialize(format='nt').splitlines(True))), end='')" > axiology_ontology_ru.nt
+ONTOLOGY_URL = "https://raw.githubusercontent.com/Wheatley961/AxiOnt/main/axiology_ontology_ru.nt"
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "axiont")
+REQUEST_TIMEOUT = (5, 30)  # секунды на соединение и на чтение; зависший запрос не блокирует запуск
+
+def ontology_cache_path(etag):
+    key = hashlib.sha256((ONTOLOGY_URL + etag).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"ontology-{key}.pkl")
+
+@st.cache_resource
+def get_ontology():
+    # Единая точка загрузки: все страницы приложения разделяют один экземпляр Graph
+    g = Graph(store=GRAPH_STORE)
+
+    # Разобранный граф сохраняется на диск списком троек в pickle: при перезапуске процесса
+    # тройки восстанавливаются без скачивания и токенизации, пока ETag не изменился
+    head = requests.head(ONTOLOGY_URL, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+    head.raise_for_status()
+    etag = head.headers.get("ETag")
+    cache_path = ontology_cache_path(etag) if etag else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                triples = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+            # Файл повреждён или записан другой версией rdflib/oxrdflib — удаляем и скачиваем заново
+            triples = None
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+        if triples is not None:
+            g.addN((s, p, o, g) for s, p, o in triples)
+            return g
+
+    # Парсер читает поток ответа напрямую, без промежуточной копии всего тела в памяти
+    with requests.get(ONTOLOGY_URL, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        g.parse(source=response.raw, format="nt")
+
+    if cache_path:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_path + ".tmp", "wb") as f:
+                pickle.dump(list(g), f, protocol=5)
+            os.replace(cache_path + ".tmp", cache_path)
+            # Файлы для прежних ETag больше не прочитаются — удаляем их
+            current = os.path.basename(cache_path)
+            for name in os.listdir(CACHE_DIR):
+                if name.startswith("ontology-") and name.endswith(".pkl") and name != current:
+                    os.remove(os.path.join(CACHE_DIR, name))
+        except OSError:
+            pass  # кэш — только ускорение, без него приложение работает как раньше
+    return g
+
+def literal_rank(o):
+    # Меньше — лучше: русский, затем литерал без языка, затем прочие языки
+    # у URIRef и BNode атрибута language нет
+    language = getattr(o, "language", None)
+    if language == 'ru':
+        return 0
+    if language is None:
+        return 1
+    return 2
+
+def preferred_literals(g, predicate):
+    values = {}  # URIRef -> str
+    ranks = {}  # URIRef -> ранг уже выбранного значения
+    for s, o in g.subject_objects(predicate):
+        rank = literal_rank(o)
+        if rank < ranks.get(s, rank + 1):
+            values[s] = str(o)
+            ranks[s] = rank
+    return values, ranks
+
+@st.cache_resource(hash_funcs={Graph: id})
+def build_label_index(g):
+    # По одному проходу на rdfs:label и rdfs:comment
+    labels, label_ranks = preferred_literals(g, RDFS.label)
+    comments, _ = preferred_literals(g, RDFS.comment)
+    uris_with_ru_label = {s for s, rank in label_ranks.items() if rank == 0}
+    return labels, comments, uris_with_ru_label
+
+@st.cache_resource(hash_funcs={Graph: id})
+def build_namespace_map(g):
+    # URI пространства имён -> префикс; строится один раз вместо поиска g.qname на каждую тройку
+    return {str(uri): prefix for prefix, uri in g.namespace_manager.namespaces()}
+
+def compact_uri(uri, ns_map):
+    sep = '#' if '#' in uri else '/'
+    base, _, local = uri.rpartition(sep)
+    prefix = ns_map.get(base + sep)
+    if prefix is None or not local:
+        return str(uri)
+    return f"{prefix}:{local}"
+
+CLASS = "class"
+OBJECT_PROPERTY = "object_property"
+DATATYPE_PROPERTY = "datatype_property"
+INDIVIDUAL = "individual"
+
+# Всё, что типизировано не этими метаклассами, считается экземпляром.
+# Порядок задаёт приоритет при нескольких rdf:type: класс важнее свойств, свойства важнее экземпляра
+SCHEMA_KINDS = {
+    OWL.Class: CLASS,
+    RDFS.Class: CLASS,
+    OWL.ObjectProperty: OBJECT_PROPERTY,
+    OWL.DatatypeProperty: DATATYPE_PROPERTY,
+}
+
+@st.cache_resource(hash_funcs={Graph: id})
+def build_typed_subjects(g):
+    # Вид -> субъекты, типизированные его метаклассами; выбираются через индекс POS
+    typed = {kind: set() for kind in SCHEMA_KINDS.values()}
+    for metaclass, kind in SCHEMA_KINDS.items():
+        typed[kind].update(g.subjects(RDF.type, metaclass))
+    return typed
+
+@st.cache_resource(hash_funcs={Graph: id})
+def build_type_index(g):
+    # Любой типизированный субъект по умолчанию экземпляр; более приоритетный вид записывается последним
+    node_kind = dict.fromkeys(g.subjects(RDF.type), INDIVIDUAL)  # URIRef -> вид сущности
+    for kind, subjects in reversed(build_typed_subjects(g).items()):
+        node_kind.update(dict.fromkeys(subjects, kind))
+    return node_kind
+
+@st.cache_resource(hash_funcs={Graph: id})
+def get_entities_and_labels_ru(g):
+    labels, comments, uris_with_ru_label = build_label_index(g)
+    typed = build_typed_subjects(g)
+
+    # Фильтруем сущности по наличию русской метки пересечением множеств; приоритет видов как в SCHEMA_KINDS.
+    # Иногда в онтологиях классы или индивиды могут не иметь rdf:type, но иметь метки — добавим их по умолчанию в индивиды
+    classes = uris_with_ru_label & typed[CLASS]
+    object_props = (uris_with_ru_label & typed[OBJECT_PROPERTY]) - classes
+    datatype_props = (uris_with_ru_label & typed[DATATYPE_PROPERTY]) - classes - object_props
+    individuals = uris_with_ru_label - classes - object_props - datatype_props
+
+    return classes, object_props, datatype_props, individuals, labels, comments, uris_with_ru_label
+
+@st.cache_resource(hash_funcs={Graph: id})
+def build_ru_adjacency(g):
+    # Субъект -> [(предикат, объект)] только для рёбер между узлами с русскими метками;
+    # строится одним проходом по индексу SPO, дальше раскладка и отрисовка обходят готовые списки.
+    # Порядок фиксирован сортировкой: порядок обхода множества зависит от рандомизации хэшей строк,
+    # а от порядка вставки узлов зависит раскладка spring_layout(seed=42) и содержимое страницы
+    _, _, ru_uris = build_label_index(g)
+    adjacency = defaultdict(list)
+    for s in sorted(ru_uris):
+        for p, o in g.predicate_objects(s):
+            if o in ru_uris:
+                adjacency[s].append((p, o))
+        if s in adjacency:
+            adjacency[s].sort()
+    return dict(adjacency)